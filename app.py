@@ -5,13 +5,21 @@ A Flask application that converts GCSS-Army BOM PDFs to DD Form 1750 Packing Lis
 Includes a review/edit interface for users to verify and modify extracted data.
 """
 
+import hashlib
+import io
 import os
-import json
+import re
 import tempfile
+import threading
+import time
 import uuid
 from datetime import datetime
-from flask import Flask, render_template, request, send_file, jsonify, session
-from werkzeug.utils import secure_filename
+from operator import attrgetter
+from pathlib import Path
+
+import msgspec
+import orjson
+from flask import Flask, render_template, request, send_file, session
 
 from dd1750_core import (
     extract_items_from_pdf,
@@ -25,38 +33,185 @@ app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 
 # Configuration
-UPLOAD_FOLDER = tempfile.gettempdir()
-ALLOWED_EXTENSIONS = {'pdf'}
+# Uploaded BOMs are kept until /generate or session expiry, so the folder must
+# hold up to an hour of uploads. Point UPLOAD_FOLDER at a tmpfs such as
+# /dev/shm/dd1750 only if it is sized for that (Docker's default is 64MB).
+# The default is a dedicated subdirectory because cleanup_expired() deletes
+# stale *_bom.pdf / *_dd1750.pdf files from it.
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(tempfile.gettempdir(), 'dd1750')
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+ALLOWED_EXTENSIONS = frozenset({'pdf'})
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 
-# In-memory storage for extraction results (use Redis/DB in production)
+# Let the fronting web server stream generated PDFs with sendfile(2) instead of
+# reading them through Python. USE_X_SENDFILE emits X-Sendfile (Apache,
+# lighttpd); X_ACCEL_REDIRECT_PREFIX rewrites it to nginx's X-Accel-Redirect,
+# mapping UPLOAD_FOLDER to that internal location.
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
+X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX')
+
+# Extraction session storage. Sessions live in Redis when REDIS_URL is set so
+# that any worker can serve /generate; otherwise fall back to an in-process dict
+# (single worker / local development only).
+SESSION_TTL = 3600  # seconds
+CLEANUP_INTERVAL = 300  # seconds between expired session/file sweeps
+SESSION_KEY_PREFIX = 'dd1750:sess:'
+SESSION_ID_RE = re.compile(r'[0-9a-f]{32}')  # uuid4().hex as issued by /upload
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    import redis
+    redis_client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(REDIS_URL))
+else:
+    redis_client = None
+
 extraction_cache = {}
 
+# BomItem fields returned to the review interface
+_ITEM_FIELDS = ('line_no', 'description', 'nsn', 'qty', 'unit_of_issue')
+_item_fields = attrgetter(*_ITEM_FIELDS)
+
+
+class ItemOut(msgspec.Struct):
+    """Extracted item as returned to the review interface."""
+    line_no: int
+    description: str
+    nsn: str
+    qty: int
+    unit_of_issue: str
+
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-
-def get_template_path():
-    """Get path to DD1750 template."""
-    # Look for template in multiple locations
-    possible_paths = [
-        os.path.join(os.path.dirname(__file__), 'templates', 'blank_1750.pdf'),
-        os.path.join(os.path.dirname(__file__), 'static', 'blank_1750.pdf'),
-        os.path.join(os.path.dirname(__file__), 'blank_1750.pdf'),
-        '/app/blank_1750.pdf',
-        '/app/templates/blank_1750.pdf',
-    ]
+    base, dot, ext = filename.rpartition('.')
+    return bool(dot) and ext.lower() in ALLOWED_EXTENSIONS
+
+
+def parse_start_page():
+    """Return the form's start_page as a non-negative int, or None if invalid."""
+    try:
+        start_page = int(request.form.get('start_page', 0))
+    except ValueError:
+        return None
+    return start_page if start_page >= 0 else None
+
+
+def fast_jsonify(obj):
+    """Build a JSON response using orjson instead of the stdlib encoder."""
+    return app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+
+# Locations searched for the DD1750 template, in order of preference
+_APP_DIR = Path(__file__).parent
+_TEMPLATE_CANDIDATES = (
+    _APP_DIR / 'templates' / 'blank_1750.pdf',
+    _APP_DIR / 'static' / 'blank_1750.pdf',
+    _APP_DIR / 'blank_1750.pdf',
+    Path('/app/blank_1750.pdf'),
+    Path('/app/templates/blank_1750.pdf'),
+)
+
+# Resolve the template once at startup; it never moves while running
+TEMPLATE_PATH = next((p for p in _TEMPLATE_CANDIDATES if p.is_file()), None)
+if TEMPLATE_PATH is None:
+    raise FileNotFoundError("DD1750 template not found")
+
+# The blank DD1750 never changes; read it once at startup
+TEMPLATE_BYTES = TEMPLATE_PATH.read_bytes()
+
+
+def result_to_dict(result):
+    """Convert an ExtractionResult into a dict serializable by msgspec."""
+    return {
+        'items': [ItemOut(*_item_fields(item)) for item in result.items],
+        'metadata': {
+            'end_item_niin': result.metadata.end_item_niin,
+            'end_item_description': result.metadata.end_item_description,
+            'lin': result.metadata.lin,
+            'serial_equip_no': result.metadata.serial_equip_no,
+            'uic': result.metadata.uic,
+            'format_detected': result.format_detected.value,
+        },
+        'item_count': len(result.items),
+        'pages_processed': result.pages_processed,
+        'warnings': result.warnings,
+        'errors': result.errors,
+    }
+
+
+def valid_session_id(session_id):
+    """Check that a client-supplied session ID has the form issued by /upload."""
+    return isinstance(session_id, str) and SESSION_ID_RE.fullmatch(session_id) is not None
+
+
+def save_session(session_id, data):
+    """Store extraction session data, expiring after SESSION_TTL seconds."""
+    if redis_client is not None:
+        redis_client.setex(SESSION_KEY_PREFIX + session_id, SESSION_TTL, msgspec.json.encode(data))
+    else:
+        extraction_cache[session_id] = data
+
+
+def pop_session(session_id):
+    """Remove and return extraction session data, or None if not found."""
+    if not valid_session_id(session_id):
+        return None
+    if redis_client is not None:
+        raw = redis_client.getdel(SESSION_KEY_PREFIX + session_id)
+        return msgspec.json.decode(raw) if raw else None
+    return extraction_cache.pop(session_id, None)
+
+
+def cleanup_expired():
+    """
+    Remove expired sessions and stale PDFs from UPLOAD_FOLDER.
     
-    for path in possible_paths:
-        if os.path.exists(path):
-            return path
+    Redis expires sessions itself via SETEX, but abandoned uploads and
+    generated PDFs would otherwise stay on disk indefinitely.
+    """
+    now = datetime.now()
+    for session_id, data in list(extraction_cache.items()):
+        if (now - datetime.fromisoformat(data['created_at'])).total_seconds() > SESSION_TTL:
+            extraction_cache.pop(session_id, None)
     
-    raise FileNotFoundError("DD1750 template not found")
+    cutoff = time.time() - SESSION_TTL
+    with os.scandir(app.config['UPLOAD_FOLDER']) as entries:
+        for entry in entries:
+            if not entry.name.endswith(('_bom.pdf', '_dd1750.pdf')):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def _janitor_loop():
+    while True:
+        time.sleep(CLEANUP_INTERVAL)
+        try:
+            cleanup_expired()
+        except Exception:
+            app.logger.exception("Cleanup of expired sessions failed")
+
+
+_janitor_lock = threading.Lock()
+_janitor_thread = None
+
+
+def ensure_janitor():
+    """Start the background cleanup thread in this process if not running."""
+    global _janitor_thread
+    if _janitor_thread is not None and _janitor_thread.is_alive():
+        return
+    with _janitor_lock:
+        # Threads do not survive a fork, so each Gunicorn worker starts its own
+        if _janitor_thread is None or not _janitor_thread.is_alive():
+            _janitor_thread = threading.Thread(target=_janitor_loop, name='dd1750-janitor', daemon=True)
+            _janitor_thread.start()
 
 
 @app.route('/')
@@ -72,70 +227,48 @@ def upload_bom():
     Returns extraction results for review.
     """
     if 'bom_file' not in request.files:
-        return jsonify({'error': 'No BOM file provided'}), 400
+        return fast_jsonify({'error': 'No BOM file provided'}), 400
     
     bom_file = request.files['bom_file']
     
     if bom_file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+        return fast_jsonify({'error': 'No file selected'}), 400
     
     if not allowed_file(bom_file.filename):
-        return jsonify({'error': 'Invalid file type. Please upload a PDF.'}), 400
+        return fast_jsonify({'error': 'Invalid file type. Please upload a PDF.'}), 400
     
-    try:
-        # Save uploaded file temporarily
-        filename = secure_filename(bom_file.filename)
-        session_id = str(uuid.uuid4())
-        bom_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{session_id}_bom.pdf")
-        bom_file.save(bom_path)
-        
-        # Get start page from form
-        start_page = int(request.form.get('start_page', 0))
-        
-        # Extract items
-        result = extract_items_from_pdf(bom_path, start_page)
-        
-        # Store in cache for later use
-        extraction_cache[session_id] = {
-            'bom_path': bom_path,
-            'result': result,
-            'created_at': datetime.now().isoformat()
-        }
-        
-        # Prepare response data
-        items_data = [
-            {
-                'line_no': item.line_no,
-                'description': item.description,
-                'nsn': item.nsn,
-                'qty': item.qty,
-                'unit_of_issue': item.unit_of_issue,
-            }
-            for item in result.items
-        ]
-        
-        metadata_data = {
-            'end_item_niin': result.metadata.end_item_niin,
-            'end_item_description': result.metadata.end_item_description,
-            'lin': result.metadata.lin,
-            'serial_equip_no': result.metadata.serial_equip_no,
-            'uic': result.metadata.uic,
-            'format_detected': result.format_detected.value,
-        }
-        
-        return jsonify({
-            'success': True,
-            'session_id': session_id,
-            'items': items_data,
-            'metadata': metadata_data,
-            'item_count': len(result.items),
-            'pages_processed': result.pages_processed,
-            'warnings': result.warnings,
-            'errors': result.errors,
-        })
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Get start page from form
+    start_page = parse_start_page()
+    if start_page is None:
+        return fast_jsonify({'error': 'Start page must be a non-negative integer'}), 400
+    
+    # Read upload into memory (bounded by MAX_CONTENT_LENGTH)
+    session_id = uuid.uuid4().hex
+    data = bom_file.read()
+    
+    # Extract items directly from memory
+    result = extract_items_from_pdf(io.BytesIO(data), start_page)
+    
+    # Persist the BOM for the /generate follow-up
+    bom_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{session_id}_bom.pdf")
+    with open(bom_path, 'wb') as f:
+        f.write(data)
+    
+    result_data = result_to_dict(result)
+    
+    # Store session for later use by /generate
+    ensure_janitor()
+    save_session(session_id, {
+        'bom_path': bom_path,
+        'result': result_data,
+        'created_at': datetime.now().isoformat()
+    })
+    
+    return app.response_class(msgspec.json.encode({
+        'success': True,
+        'session_id': session_id,
+        **result_data,
+    }), mimetype='application/json')
 
 
 @app.route('/generate', methods=['POST'])
@@ -144,67 +277,92 @@ def generate_dd1750():
     Generate DD1750 PDF from reviewed/edited items.
     """
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-        
-        session_id = data.get('session_id')
-        items_data = data.get('items', [])
-        header_data = data.get('header', {})
-        
-        if not items_data:
-            return jsonify({'error': 'No items to generate'}), 400
-        
-        # Convert JSON data back to BomItem objects
-        items = []
-        for i, item_data in enumerate(items_data):
-            item = BomItem(
-                line_no=i + 1,
-                description=item_data.get('description', ''),
-                nsn=item_data.get('nsn', ''),
-                qty=int(item_data.get('qty', 1)),
-                unit_of_issue=item_data.get('unit_of_issue', 'EA'),
-            )
-            items.append(item)
-        
-        # Create HeaderInfo from form data
-        header = HeaderInfo(
-            packed_by=header_data.get('packed_by', ''),
-            num_boxes=header_data.get('num_boxes', '1'),
-            requisition_no=header_data.get('requisition_no', ''),
-            order_no=header_data.get('order_no', ''),
-            end_item=header_data.get('end_item', ''),
-            date=header_data.get('date', ''),
-        )
-        
-        # Generate PDF
-        template_path = get_template_path()
-        output_path = os.path.join(
-            app.config['UPLOAD_FOLDER'],
-            f"{session_id or uuid.uuid4()}_dd1750.pdf"
+        data = orjson.loads(request.get_data())
+    except orjson.JSONDecodeError:
+        return fast_jsonify({'error': 'Invalid JSON'}), 400
+    
+    if not data:
+        return fast_jsonify({'error': 'No data provided'}), 400
+    
+    if not isinstance(data, dict):
+        return fast_jsonify({'error': 'Invalid JSON'}), 400
+    
+    session_id = data.get('session_id')
+    items_data = data.get('items', [])
+    header_data = data.get('header', {})
+    
+    if session_id is not None and not valid_session_id(session_id):
+        return fast_jsonify({'error': 'Invalid session ID'}), 400
+    
+    if not items_data:
+        return fast_jsonify({'error': 'No items to generate'}), 400
+    
+    # Convert JSON data back to BomItem objects
+    items = [
+        BomItem(
+            line_no=i,
+            description=item_data.get('description', ''),
+            nsn=item_data.get('nsn', ''),
+            qty=int(item_data.get('qty', 1)),
+            unit_of_issue=item_data.get('unit_of_issue', 'EA'),
         )
-        
-        output_path, count = generate_dd1750_from_items(items, template_path, output_path, header)
-        
-        # Clean up cache if session exists
-        if session_id and session_id in extraction_cache:
-            cache_data = extraction_cache.pop(session_id)
-            if os.path.exists(cache_data.get('bom_path', '')):
-                try:
-                    os.remove(cache_data['bom_path'])
-                except:
-                    pass
-        
+        for i, item_data in enumerate(items_data, start=1)
+    ]
+    
+    # Create HeaderInfo from form data
+    header = HeaderInfo(
+        packed_by=header_data.get('packed_by', ''),
+        num_boxes=header_data.get('num_boxes', '1'),
+        requisition_no=header_data.get('requisition_no', ''),
+        order_no=header_data.get('order_no', ''),
+        end_item=header_data.get('end_item', ''),
+        date=header_data.get('date', ''),
+    )
+    
+    # Generate PDF
+    ensure_janitor()
+    # Never build paths from the client's session_id; it is only a lookup key
+    output_path = os.path.join(
+        app.config['UPLOAD_FOLDER'],
+        f"{uuid.uuid4().hex}_dd1750.pdf"
+    )
+    
+    output_path, count = generate_dd1750_from_items(items, TEMPLATE_BYTES, output_path, header)
+    
+    # Clean up session if it exists
+    cache_data = pop_session(session_id) if session_id else None
+    if cache_data:
+        if os.path.exists(cache_data.get('bom_path', '')):
+            try:
+                os.remove(cache_data['bom_path'])
+            except:
+                pass
+    
+    # The PDF is only downloaded once. When the web server sends it via
+    # X-Sendfile it still needs the file, so leave that to cleanup_expired();
+    # otherwise read it into memory and remove the file right away.
+    if app.config['USE_X_SENDFILE']:
         return send_file(
             output_path,
             as_attachment=True,
             download_name='DD1750.pdf',
-            mimetype='application/pdf'
+            mimetype='application/pdf',
+            conditional=True
         )
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    
+    last_modified = os.path.getmtime(output_path)
+    with open(output_path, 'rb') as f:
+        pdf_data = f.read()
+    os.remove(output_path)
+    
+    return send_file(
+        io.BytesIO(pdf_data),
+        as_attachment=True,
+        download_name='DD1750.pdf',
+        mimetype='application/pdf',
+        last_modified=last_modified,
+        conditional=True
+    )
 
 
 @app.route('/quick-generate', methods=['POST'])
@@ -222,77 +380,112 @@ def quick_generate():
     if bom_file.filename == '':
         return "No file selected", 400
     
+    start_page = parse_start_page()
+    if start_page is None:
+        return "Start page must be a non-negative integer", 400
+    
     try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Save BOM
-            bom_path = os.path.join(tmpdir, 'bom.pdf')
-            bom_file.save(bom_path)
+        with tempfile.TemporaryDirectory(dir=app.config['UPLOAD_FOLDER']) as tmpdir:
+            # Read BOM into memory (bounded by MAX_CONTENT_LENGTH)
+            bom_data = bom_file.read()
             
             # Get or use default template
             if template_file and template_file.filename:
-                tpl_path = os.path.join(tmpdir, 'template.pdf')
-                template_file.save(tpl_path)
+                template = template_file.read()
             else:
-                tpl_path = get_template_path()
+                template = TEMPLATE_BYTES
             
             # Output path
             out_path = os.path.join(tmpdir, 'dd1750.pdf')
             
-            # Get start page
-            start_page = int(request.form.get('start_page', 0))
-            
             # Extract and generate
-            result = extract_items_from_pdf(bom_path, start_page)
+            result = extract_items_from_pdf(io.BytesIO(bom_data), start_page)
             
             if not result.items:
                 return "No items found in BOM. Ensure this is a GCSS-Army format BOM.", 400
             
-            out_path, count = generate_dd1750_from_items(result.items, tpl_path, out_path)
+            out_path, count = generate_dd1750_from_items(result.items, template, out_path)
             
-            return send_file(
-                out_path,
-                as_attachment=True,
-                download_name='DD1750.pdf',
-                mimetype='application/pdf'
-            )
+            # Read the output before the temporary directory is removed;
+            # send_file would otherwise stream it after cleanup
+            with open(out_path, 'rb') as f:
+                pdf_data = f.read()
+        
+        return send_file(
+            io.BytesIO(pdf_data),
+            as_attachment=True,
+            download_name='DD1750.pdf',
+            mimetype='application/pdf'
+        )
             
     except Exception as e:
         return f"Error: {str(e)}", 500
 
 
+# Static payload for /api/formats, serialized once at import
+_FORMATS_JSON = orjson.dumps({
+    'supported_formats': [
+        {
+            'name': 'GCSS-Army Component Listing',
+            'description': 'Standard Component Listing / Hand Receipt with LV column',
+            'identifier': BomFormat.GCSS_ARMY_STANDARD.value,
+        },
+        {
+            'name': 'Equipment Property Record',
+            'description': 'EPP format BOM',
+            'identifier': BomFormat.EPP_FORMAT.value,
+        }
+    ],
+    'note': 'Handwritten BOMs are not supported. Please obtain clean digital BOMs from GCSS-Army.',
+})
+_FORMATS_ETAG = hashlib.sha1(_FORMATS_JSON).hexdigest()
+
+
 @app.route('/api/formats')
 def get_supported_formats():
     """Return information about supported BOM formats."""
-    return jsonify({
-        'supported_formats': [
-            {
-                'name': 'GCSS-Army Component Listing',
-                'description': 'Standard Component Listing / Hand Receipt with LV column',
-                'identifier': BomFormat.GCSS_ARMY_STANDARD.value,
-            },
-            {
-                'name': 'Equipment Property Record',
-                'description': 'EPP format BOM',
-                'identifier': BomFormat.EPP_FORMAT.value,
-            }
-        ],
-        'note': 'Handwritten BOMs are not supported. Please obtain clean digital BOMs from GCSS-Army.',
-    })
+    response = app.response_class(
+        _FORMATS_JSON,
+        mimetype='application/json',
+        headers={'Cache-Control': 'public, max-age=86400'}
+    )
+    response.set_etag(_FORMATS_ETAG)
+    return response.make_conditional(request)
+
+
+@app.after_request
+def x_accel_redirect(response):
+    """Translate X-Sendfile into nginx's X-Accel-Redirect when configured."""
+    path = response.headers.get('X-Sendfile')
+    if path and X_ACCEL_REDIRECT_PREFIX:
+        rel_path = os.path.relpath(path, app.config['UPLOAD_FOLDER'])
+        del response.headers['X-Sendfile']
+        response.headers['X-Accel-Redirect'] = f"{X_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{rel_path}"
+    return response
 
 
 @app.errorhandler(413)
 def too_large(e):
     """Handle file too large error."""
-    return jsonify({'error': 'File too large. Maximum size is 16MB.'}), 413
+    return fast_jsonify({'error': 'File too large. Maximum size is 16MB.'}), 413
 
 
 @app.errorhandler(500)
 def server_error(e):
-    """Handle internal server errors."""
-    return jsonify({'error': 'Internal server error'}), 500
+    """
+    Handle internal server errors.
+    
+    Flask has already logged the unhandled exception with its traceback;
+    return a fixed message so exception details never reach the client.
+    """
+    return fast_jsonify({'error': 'Internal server error'}), 500
 
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
     debug = os.environ.get('DEBUG', 'false').lower() == 'true'
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    if debug:
+        app.run(host='0.0.0.0', port=port, debug=debug)
+    else:
+        print("The built-in server is for development only; set DEBUG=true to use it.")
+        print("For production run: gunicorn app:app -c gunicorn.conf.py")
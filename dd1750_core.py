@@ -13,17 +13,32 @@ BOMs from GCSS-Army through their supply teams.
 """
 
 import io
-import math
+import logging
+import multiprocessing
+import os
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple, Dict, Any
+from typing import List, Optional, Tuple, Dict, Any, BinaryIO, Union
 from enum import Enum
 
 import pdfplumber
 from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (
+    DictionaryObject, ArrayObject, IndirectObject, NameObject,
+    TextStringObject, NumberObject, FloatObject
+)
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
 
 # DD1750 Form Layout Constants (Letter size: 612 x 792 points)
 # These measurements are from the official DD FORM 1750, SEP 70 (EG)
@@ -39,11 +54,94 @@ X_INIT_L, X_INIT_R = 408.6, 453.6       # Initial Operation
 X_SPARES_L, X_SPARES_R = 453.6, 514.8   # Running Spares
 X_TOTAL_L, X_TOTAL_R = 514.8, 567.0     # Total
 
+# Text anchor x coordinates within the columns
+X_BOX_C = (X_BOX_L + X_BOX_R) / 2
+X_UOI_C = (X_UOI_L + X_UOI_R) / 2
+X_INIT_C = (X_INIT_L + X_INIT_R) / 2
+X_SPARES_C = (X_SPARES_L + X_SPARES_R) / 2
+X_TOTAL_C = (X_TOTAL_L + X_TOTAL_R) / 2
+
 # Row layout (PDF coordinates: 0 at bottom)
 Y_TABLE_TOP = 616.0      # Top of table content area
 Y_TABLE_BOTTOM = 89.1    # Bottom of table content area
 ROW_H = (Y_TABLE_TOP - Y_TABLE_BOTTOM) / ROWS_PER_PAGE  # ~29.27 points
 PAD_X = 3.0  # Horizontal padding from column edge
+# Baselines of the first (description/values) and second (NSN) text line of each row
+_ROW_Y_LINE1 = tuple(Y_TABLE_TOP - (i * ROW_H) - 10.0 for i in range(ROWS_PER_PAGE))
+_ROW_Y_LINE2 = tuple(y - 10.0 for y in _ROW_Y_LINE1)
+X_CONTENT_TEXT = X_CONTENT_L + PAD_X  # Left edge of description/NSN text
+
+# Precompiled regular expressions used during extraction
+_NIIN9_LINE_START = re.compile(r'(?m)^\s*(\d{9})\b')              # NIIN at start of any line
+_NIIN9 = re.compile(r'\b(\d{9})\b')                                # NIIN anywhere
+_NSN_FULL = re.compile(r'\b(\d{4})-(\d{2})-(\d{3})-(\d{4})\b')  # FSC-NIIN (XXXX-XX-XXX-XXXX)
+_CODE_TAIL = re.compile(
+    r'\s+(WTY|ARC|CIIC|UI|SCMC|EA|AY|9K|9G|9B|9T|2B|2E|2W|2T|85|7K|7B)$',
+    re.IGNORECASE
+)
+_TRAILING_SLASH = re.compile(r'[/\\]+\s*$')
+_FIRST_INT = re.compile(r'(\d+)')
+
+# BOM header metadata. Each field is searched separately: matches may overlap
+# (the DESC value can run into the fields after it) and each field takes its
+# first match. A single alternation scan either loses overlapping fields or,
+# written as a lookahead, is slower than these six prefix searches.
+_META_END_ITEM_NIIN = re.compile(r'END\s*ITEM\s*NIIN[:\s]*(\d{9})', re.IGNORECASE)
+_META_LIN = re.compile(r'LIN[:\s]*([A-Z0-9]+)', re.IGNORECASE)
+_META_DESC = re.compile(r'DESC[:\s]*([A-Z0-9\s/\-]+)', re.IGNORECASE)
+_META_SER_EQUIP = re.compile(r'SER/EQUIP\s*NO[:\s]*([A-Z0-9]+)', re.IGNORECASE)
+_META_UIC = re.compile(r'UIC[:\s]*([A-Z0-9]+)', re.IGNORECASE)
+_META_FE = re.compile(r'FE[:\s]*(\d+)', re.IGNORECASE)
+
+# Header cell classification for find_column_indices. Exact header names are
+# checked first, then substring rules in priority order (all needles must match).
+_HEADER_EXACT = {
+    'LV': 'lv', 'LEVEL': 'lv',
+    'MAT': 'material',
+    'UI': 'ui', 'UNIT': 'ui',
+    'IMG': 'image',
+}
+_HEADER_SUBSTR = (
+    (('DESC',), 'description'),
+    (('MATERIAL',), 'material'),
+    (('AUTH', 'QTY'), 'auth_qty'),
+    (('OH', 'QTY'), 'oh_qty'),
+    (('IMAGE',), 'image'),
+)
+
+# Category/header descriptions that are not real items. GCSS-Army rows are
+# skipped if they contain any of the patterns; EPP rows only on an exact match.
+_SKIP_DESC_RE = re.compile(
+    r'COMPONENT OF END ITEM|BASIC ISSUE ITEMS|COEI-|BII-|OPERATIONAL SUPPORT',
+    re.IGNORECASE
+)
+_SKIP_DESC_EXACT_RE = re.compile(
+    r'COMPONENT OF END ITEM|BASIC ISSUE ITEMS|OPERATIONAL SUPPORT|COEI|BII',
+    re.IGNORECASE
+)
+
+# Multi-page BOMs can be extracted in parallel worker processes. This is
+# opt-in: every web server worker process gets its own pool, each pool process
+# imports the PDF libraries, and os.cpu_count() reports host CPUs inside
+# containers. Size it as CPUs / web workers when enabling. Documents with
+# fewer than PARALLEL_MIN_PAGES pages are not worth the process overhead.
+EXTRACT_WORKERS = int(os.environ.get('EXTRACT_WORKERS', 1))
+PARALLEL_MIN_PAGES = 4
+
+# PDF parsing backend used for BOM extraction: "pymupdf" (default, much faster)
+# or "pdfplumber". Falls back to pdfplumber if PyMuPDF is not installed.
+PDF_BACKEND = os.environ.get('PDF_BACKEND', 'pymupdf').lower()
+if PDF_BACKEND == 'pymupdf' and fitz is None:
+    PDF_BACKEND = 'pdfplumber'
+
+# Table finder settings understood by both backends. 'clip' is a page region
+# (x0, top, x1, bottom) in points from the top-left corner; it crops the page
+# for pdfplumber and is passed as find_tables(clip=...) for PyMuPDF.
+TABLE_SETTING_KEYS = frozenset({
+    'clip', 'vertical_strategy', 'horizontal_strategy',
+    'snap_tolerance', 'join_tolerance', 'intersection_tolerance',
+})
+TABLE_STRATEGIES = frozenset({'lines', 'lines_strict', 'text'})
 
 
 class BomFormat(Enum):
@@ -53,7 +151,7 @@ class BomFormat(Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@dataclass(slots=True)
 class BomItem:
     """Represents a single item from a Bill of Materials."""
     line_no: int
@@ -120,31 +218,32 @@ def detect_bom_format(tables: List[List[List[str]]], page_text: str) -> BomForma
     Returns:
         Detected BomFormat enum value
     """
-    # Check for GCSS-Army standard format markers
-    if "COMPONENT LISTING" in page_text.upper() or "HAND RECEIPT" in page_text.upper():
-        # Look for LV column in headers
-        for table in tables:
-            if table and len(table) > 0:
-                header = table[0]
-                header_text = ' '.join(str(cell or '') for cell in header).upper()
-                if 'LV' in header_text or 'LEVEL' in header_text:
-                    return BomFormat.GCSS_ARMY_STANDARD
-        
-        # Even without LV column, if it has the standard structure
-        if "AUTH" in page_text.upper() and "QTY" in page_text.upper():
+    upper_text = page_text.upper()
+    is_listing = "COMPONENT LISTING" in upper_text or "HAND RECEIPT" in upper_text
+    
+    # Single pass over table headers
+    has_material_desc = False
+    for table in tables:
+        if not table:
+            continue
+        header_text = ' '.join(str(cell or '') for cell in table[0]).upper()
+        # GCSS-Army standard format: Component Listing with an LV column
+        if is_listing and ('LV' in header_text or 'LEVEL' in header_text):
             return BomFormat.GCSS_ARMY_STANDARD
+        if 'MATERIAL' in header_text and 'DESCRIPTION' in header_text:
+            has_material_desc = True
+    
+    # Even without LV column, if it has the standard structure
+    if is_listing and "AUTH" in upper_text and "QTY" in upper_text:
+        return BomFormat.GCSS_ARMY_STANDARD
     
     # Check for EPP format markers
-    if "PWR PLANT" in page_text.upper() or "OPERATIONAL SUPPORT" in page_text.upper():
+    if "PWR PLANT" in upper_text or "OPERATIONAL SUPPORT" in upper_text:
         return BomFormat.EPP_FORMAT
     
     # Default to standard format if we see Material and Description columns
-    for table in tables:
-        if table and len(table) > 0:
-            header = table[0]
-            header_text = ' '.join(str(cell or '') for cell in header).upper()
-            if 'MATERIAL' in header_text and 'DESCRIPTION' in header_text:
-                return BomFormat.GCSS_ARMY_STANDARD
+    if has_material_desc:
+        return BomFormat.GCSS_ARMY_STANDARD
     
     return BomFormat.UNKNOWN
 
@@ -172,31 +271,21 @@ def find_column_indices(header: List[str]) -> Dict[str, Optional[int]]:
     for i, cell in enumerate(header):
         if not cell:
             continue
-        text = str(cell).upper().strip()
-        # Also check for multi-line headers
-        text_joined = text.replace('\n', ' ')
-        
-        # Level column
-        if text in ('LV', 'LEVEL') or 'LV' in text.split():
-            indices['lv'] = i
-        # Description column
-        elif 'DESC' in text:
-            indices['description'] = i
-        # Material column
-        elif 'MATERIAL' in text or text == 'MAT':
-            indices['material'] = i
-        # Authorized quantity - check for "AUTH" and "QTY" together
-        elif ('AUTH' in text_joined and 'QTY' in text_joined) or text_joined == 'AUTH QTY':
-            indices['auth_qty'] = i
-        # On-Hand quantity (rightmost qty column)
-        elif ('OH' in text_joined and 'QTY' in text_joined) or text_joined == 'OH QTY':
-            indices['oh_qty'] = i
-        # Unit of Issue
-        elif text == 'UI' or text == 'UNIT':
-            indices['ui'] = i
-        # Image column (usually first)
-        elif 'IMAGE' in text or text == 'IMG':
-            indices['image'] = i
+        # Normalize once; multi-line headers (e.g. "Auth\nQty") become one line
+        text = str(cell).upper().replace('\n', ' ').strip()
+        
+        column = _HEADER_EXACT.get(text)
+        if column is None:
+            if 'LV' in text.split():
+                column = 'lv'
+            else:
+                for needles, name in _HEADER_SUBSTR:
+                    if all(needle in text for needle in needles):
+                        column = name
+                        break
+        
+        if column is not None:
+            indices[column] = i
     
     return indices
 
@@ -220,25 +309,16 @@ def extract_nsn_from_material(material_text: str) -> str:
     if not material_text:
         return ""
     
-    text = str(material_text).strip()
-    
-    # First, look for 9-digit number at the start of a line or the text
-    # This handles the common format where NIIN is on first line
-    lines = text.split('\n')
-    for line in lines:
-        line = line.strip()
-        # Check if line starts with 9 digits
-        match = re.match(r'^(\d{9})\b', line)
-        if match:
-            return match.group(1)
+    text = str(material_text)
     
-    # Look for any 9-digit number in the text
-    match = re.search(r'\b(\d{9})\b', text)
+    # First, look for 9-digit number at the start of a line (the common format
+    # where NIIN is on first line), then for any 9-digit number in the text
+    match = _NIIN9_LINE_START.search(text) or _NIIN9.search(text)
     if match:
         return match.group(1)
     
     # Look for full NSN format (XXXX-XX-XXX-XXXX) and extract NIIN portion
-    nsn_match = re.search(r'\b(\d{4})-(\d{2})-(\d{3})-(\d{4})\b', text)
+    nsn_match = _NSN_FULL.search(text)
     if nsn_match:
         # NIIN is the last 9 digits: FSC-NIIN format
         # Return digits 3-4 (2 chars) + digits 5-7 (3 chars) + digits 8-11 (4 chars)
@@ -270,11 +350,10 @@ def clean_description(desc_text: str) -> str:
         description = description.split('(')[0].strip()
     
     # Remove trailing codes that sometimes appear
-    codes_pattern = r'\s+(WTY|ARC|CIIC|UI|SCMC|EA|AY|9K|9G|9B|9T|2B|2E|2W|2T|85|7K|7B)$'
-    description = re.sub(codes_pattern, '', description, flags=re.IGNORECASE)
+    description = _CODE_TAIL.sub('', description)
     
     # Normalize whitespace
-    description = re.sub(r'\s+', ' ', description).strip()
+    description = ' '.join(description.split())
     
     return description
 
@@ -295,7 +374,7 @@ def extract_quantity(qty_cell: Any) -> int:
     qty_str = str(qty_cell).strip()
     
     # Find first number in the string
-    match = re.search(r'(\d+)', qty_str)
+    match = _FIRST_INT.search(qty_str)
     if match:
         return int(match.group(1))
     
@@ -341,14 +420,24 @@ def extract_items_gcss_standard(tables: List[List[List[str]]]) -> List[BomItem]:
         if indices['description'] is None:
             continue
         
+        lv_i = indices['lv']
+        desc_i = indices['description']
+        mat_i = indices['material']
+        aq_i = indices['auth_qty']
+        hdr_len = len(header)
+        
         for row_num, row in enumerate(table[1:]):
             # Skip empty rows
-            if not any(cell for cell in row if cell):
+            if not any(row):
                 continue
             
+            # Pad short rows so every column index is in range
+            if len(row) < hdr_len:
+                row = row + [None] * (hdr_len - len(row))
+            
             # Check if this is a "B" level item (component)
-            if indices['lv'] is not None:
-                lv_cell = row[indices['lv']] if indices['lv'] < len(row) else None
+            if lv_i is not None:
+                lv_cell = row[lv_i]
                 if not lv_cell:
                     continue
                 lv_value = str(lv_cell).strip().upper()
@@ -359,7 +448,7 @@ def extract_items_gcss_standard(tables: List[List[List[str]]]) -> List[BomItem]:
             # Extract description - ALWAYS use the FIRST LINE
             # The first line contains the clean nomenclature (e.g., "CHAIN ASSEMBLY,SINGLE LEG")
             # Lower lines may have additional details but can be truncated/fragmented
-            desc_cell = row[indices['description']] if indices['description'] < len(row) else None
+            desc_cell = row[desc_i]
             description = ""
             if desc_cell:
                 lines = str(desc_cell).strip().split('\n')
@@ -371,30 +460,26 @@ def extract_items_gcss_standard(tables: List[List[List[str]]]) -> List[BomItem]:
                         break
                 
                 # Clean up
-                description = re.sub(r'\s+', ' ', description).strip()  # Normalize whitespace
-                description = re.sub(r'[/\\]+\s*$', '', description)    # Remove trailing slashes
+                description = ' '.join(description.split())  # Normalize whitespace
+                description = _TRAILING_SLASH.sub('', description)    # Remove trailing slashes
             
             if not description or len(description) < 3:
                 continue
             
             # Skip category descriptions
-            skip_patterns = [
-                'COMPONENT OF END ITEM', 'BASIC ISSUE ITEMS', 
-                'COEI-', 'BII-', 'OPERATIONAL SUPPORT'
-            ]
-            if any(pat in description.upper() for pat in skip_patterns):
+            if _SKIP_DESC_RE.search(description):
                 continue
             
             # Extract NSN from material column
             nsn = ""
-            if indices['material'] is not None and indices['material'] < len(row):
-                mat_cell = row[indices['material']]
+            if mat_i is not None:
+                mat_cell = row[mat_i]
                 nsn = extract_nsn_from_material(mat_cell)
             
             # Extract quantity from Auth Qty column
             qty = 1  # Default
-            if indices['auth_qty'] is not None and indices['auth_qty'] < len(row):
-                qty_cell = row[indices['auth_qty']]
+            if aq_i is not None:
+                qty_cell = row[aq_i]
                 if qty_cell:
                     qty = extract_quantity(qty_cell)
             
@@ -460,39 +545,48 @@ def extract_items_epp_format(tables: List[List[List[str]]], page_text: str) -> L
         if not has_description:
             continue
         
+        lv_i = indices['lv']
+        desc_i = indices['description']
+        mat_i = indices['material']
+        aq_i = indices['auth_qty']
+        hdr_len = len(header)
+        
         for row in table[1:]:
-            if not any(cell for cell in row if cell):
+            if not any(row):
                 continue
             
+            # Pad short rows so every column index is in range
+            if len(row) < hdr_len:
+                row = row + [None] * (hdr_len - len(row))
+            
             # If LV column exists, check for 'B' level items
             # But EPP format often doesn't have LV column
-            if has_lv and indices['lv'] is not None:
-                lv_cell = row[indices['lv']] if indices['lv'] < len(row) else None
+            if has_lv and lv_i is not None:
+                lv_cell = row[lv_i]
                 if lv_cell and str(lv_cell).strip().upper() == 'A':
                     # Skip category headers (A level)
                     continue
             
             # Extract description
-            desc_cell = row[indices['description']] if indices['description'] < len(row) else None
+            desc_cell = row[desc_i]
             description = clean_description(desc_cell)
             
             if not description:
                 continue
             
             # Skip obvious header/category rows
-            if description.upper() in ('COMPONENT OF END ITEM', 'BASIC ISSUE ITEMS', 
-                                        'OPERATIONAL SUPPORT', 'COEI', 'BII'):
+            if _SKIP_DESC_EXACT_RE.fullmatch(description):
                 continue
             
             # Extract NSN from material column
             nsn = ""
-            if indices['material'] is not None and indices['material'] < len(row):
-                nsn = extract_nsn_from_material(row[indices['material']])
+            if mat_i is not None:
+                nsn = extract_nsn_from_material(row[mat_i])
             
             # Extract quantity from Auth Qty column
             qty = 1
-            if indices['auth_qty'] is not None and indices['auth_qty'] < len(row):
-                qty = extract_quantity(row[indices['auth_qty']])
+            if aq_i is not None:
+                qty = extract_quantity(row[aq_i])
             
             # Always use EA for unit of issue
             items.append(BomItem(
@@ -519,39 +613,163 @@ def extract_metadata(page_text: str) -> BomMetadata:
     metadata = BomMetadata()
     
     # END ITEM NIIN
-    match = re.search(r'END\s*ITEM\s*NIIN[:\s]*(\d{9})', page_text, re.IGNORECASE)
+    match = _META_END_ITEM_NIIN.search(page_text)
     if match:
         metadata.end_item_niin = match.group(1)
     
     # LIN
-    match = re.search(r'LIN[:\s]*([A-Z0-9]+)', page_text, re.IGNORECASE)
+    match = _META_LIN.search(page_text)
     if match:
         metadata.lin = match.group(1)
     
     # Description (after DESC:)
-    match = re.search(r'DESC[:\s]*([A-Z0-9\s/\-]+)', page_text, re.IGNORECASE)
+    match = _META_DESC.search(page_text)
     if match:
         metadata.end_item_description = match.group(1).strip()[:50]
     
     # Serial/Equipment Number
-    match = re.search(r'SER/EQUIP\s*NO[:\s]*([A-Z0-9]+)', page_text, re.IGNORECASE)
+    match = _META_SER_EQUIP.search(page_text)
     if match:
         metadata.serial_equip_no = match.group(1)
     
     # UIC
-    match = re.search(r'UIC[:\s]*([A-Z0-9]+)', page_text, re.IGNORECASE)
+    match = _META_UIC.search(page_text)
     if match:
         metadata.uic = match.group(1)
     
     # FE
-    match = re.search(r'FE[:\s]*(\d+)', page_text, re.IGNORECASE)
+    match = _META_FE.search(page_text)
     if match:
         metadata.fe = match.group(1)
     
     return metadata
 
 
-def extract_items_from_pdf(pdf_path: str, start_page: int = 0) -> ExtractionResult:
+def _open_pdf(pdf_path: Union[str, bytes, BinaryIO]):
+    """Open a BOM PDF with the configured backend (usable as a context manager)."""
+    if isinstance(pdf_path, (bytes, bytearray)):
+        pdf_path = io.BytesIO(pdf_path)
+    if PDF_BACKEND == 'pymupdf':
+        if isinstance(pdf_path, (str, os.PathLike)):
+            return fitz.open(pdf_path)
+        return fitz.open(stream=pdf_path.read(), filetype="pdf")
+    return pdfplumber.open(pdf_path)
+
+
+def _page_count(pdf) -> int:
+    """Return the number of pages in a document opened by _open_pdf."""
+    if PDF_BACKEND == 'pymupdf':
+        return pdf.page_count
+    return len(pdf.pages)
+
+
+def _check_table_settings(table_settings: Optional[Dict[str, Any]]) -> None:
+    """Raise if table_settings uses options not supported by both backends."""
+    if not table_settings:
+        return
+    unknown = table_settings.keys() - TABLE_SETTING_KEYS
+    if unknown:
+        raise TypeError(f"Unsupported table settings: {', '.join(sorted(unknown))}")
+    for key in ('vertical_strategy', 'horizontal_strategy'):
+        if key in table_settings and table_settings[key] not in TABLE_STRATEGIES:
+            raise ValueError(f"Unsupported {key}: {table_settings[key]!r}")
+    clip = table_settings.get('clip')
+    if clip is not None and len(clip) != 4:
+        raise ValueError("clip must be a (x0, top, x1, bottom) tuple")
+
+
+def _read_page(
+    pdf,
+    page_num: int,
+    table_settings: Optional[Dict[str, Any]] = None
+) -> Tuple[str, List[List[List[str]]]]:
+    """
+    Extract text and tables from a single page.
+    
+    Args:
+        pdf: Document opened by _open_pdf
+        page_num: Page number (0-based)
+        table_settings: Optional table finder settings (see TABLE_SETTING_KEYS)
+        
+    Returns:
+        Tuple of (page_text, tables) where tables are lists of rows of cells
+    """
+    settings = dict(table_settings or {})
+    if PDF_BACKEND == 'pymupdf':
+        page = pdf[page_num]
+        tables = [table.extract() for table in page.find_tables(**settings).tables]
+        return page.get_text() or "", tables
+    
+    # Page text always comes from the whole page; only table finding is cropped
+    page = pdf.pages[page_num]
+    clip = settings.pop('clip', None)
+    table_page = page.crop(clip) if clip is not None else page
+    return page.extract_text() or "", table_page.extract_tables(settings or None)
+
+
+def _extract_page_items(tables: List[List[List[str]]], page_text: str, bom_format: BomFormat) -> List[BomItem]:
+    """Extract items from one page's tables using the detected BOM format."""
+    if bom_format == BomFormat.GCSS_ARMY_STANDARD:
+        return extract_items_gcss_standard(tables)
+    if bom_format == BomFormat.EPP_FORMAT:
+        return extract_items_epp_format(tables, page_text)
+    
+    # Try standard format as fallback
+    page_items = extract_items_gcss_standard(tables)
+    if not page_items:
+        page_items = extract_items_epp_format(tables, page_text)
+    return page_items
+
+
+def _extract_pages_worker(
+    pdf_path: Union[str, bytes],
+    page_nums: List[int],
+    bom_format: BomFormat,
+    table_settings: Optional[Dict[str, Any]] = None
+) -> List[List[BomItem]]:
+    """
+    Extract items from a run of pages (runs in a worker process).
+    
+    Args:
+        pdf_path: Path to the BOM PDF or its contents as bytes
+        page_nums: Page numbers to process (0-based)
+        bom_format: Format detected from the first page
+        table_settings: Optional table finder settings (see TABLE_SETTING_KEYS)
+        
+    Returns:
+        List of per-page item lists, in the order of page_nums
+    """
+    with _open_pdf(pdf_path) as pdf:
+        pages = []
+        for page_num in page_nums:
+            page_text, tables = _read_page(pdf, page_num, table_settings)
+            pages.append(_extract_page_items(tables, page_text, bom_format))
+        return pages
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the shared process pool for page extraction, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn rather than fork: callers (e.g. threaded web workers) may have
+            # other threads running, which makes fork unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def extract_items_from_pdf(
+    pdf_path: Union[str, BinaryIO],
+    start_page: int = 0,
+    table_settings: Optional[Dict[str, Any]] = None
+) -> ExtractionResult:
     """
     Extract BOM items from a PDF file.
     
@@ -560,24 +778,42 @@ def extract_items_from_pdf(pdf_path: str, start_page: int = 0) -> ExtractionResu
     - EPP format
     
     Args:
-        pdf_path: Path to the BOM PDF file
+        pdf_path: Path to the BOM PDF file, or a binary file-like object
+            (e.g. io.BytesIO) containing the PDF data
         start_page: Page number to start extraction (0-based)
+        table_settings: Optional table finder settings for tuning extraction
+            on known layouts, using only keys in TABLE_SETTING_KEYS so they
+            behave the same with either PDF_BACKEND (e.g.
+            {'vertical_strategy': 'text', 'clip': (0, 150, 612, 792)}).
+            Defaults to the backend's automatic table detection.
         
     Returns:
         ExtractionResult containing items, metadata, and any warnings/errors
+        
+    Raises:
+        TypeError: If table_settings contains an unsupported key
+        ValueError: If a table_settings value is invalid
     """
+    _check_table_settings(table_settings)
     result = ExtractionResult()
     
+    # Worker processes need a picklable source: keep paths, read streams to bytes
+    if not isinstance(pdf_path, (str, os.PathLike)):
+        pdf_path = pdf_path.read()
+    
+    if start_page < 0:
+        result.errors.append(f"Start page {start_page} must not be negative")
+        return result
+    
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            if start_page >= len(pdf.pages):
-                result.errors.append(f"Start page {start_page} exceeds document length ({len(pdf.pages)} pages)")
+        with _open_pdf(pdf_path) as pdf:
+            num_pages = _page_count(pdf)
+            if start_page >= num_pages:
+                result.errors.append(f"Start page {start_page} exceeds document length ({num_pages} pages)")
                 return result
             
             # Get first page text for metadata and format detection
-            first_page = pdf.pages[start_page]
-            first_page_text = first_page.extract_text() or ""
-            first_page_tables = first_page.extract_tables()
+            first_page_text, first_page_tables = _read_page(pdf, start_page, table_settings)
             
             # Detect format
             result.format_detected = detect_bom_format(first_page_tables, first_page_text)
@@ -585,23 +821,27 @@ def extract_items_from_pdf(pdf_path: str, start_page: int = 0) -> ExtractionResu
             result.metadata.bom_format = result.format_detected
             
             # Extract items from all pages
-            all_items = []
-            for page_num, page in enumerate(pdf.pages[start_page:], start=start_page):
-                result.pages_processed += 1
-                tables = page.extract_tables()
-                page_text = page.extract_text() or ""
-                
-                if result.format_detected == BomFormat.GCSS_ARMY_STANDARD:
-                    page_items = extract_items_gcss_standard(tables)
-                elif result.format_detected == BomFormat.EPP_FORMAT:
-                    page_items = extract_items_epp_format(tables, page_text)
-                else:
-                    # Try standard format as fallback
-                    page_items = extract_items_gcss_standard(tables)
-                    if not page_items:
-                        page_items = extract_items_epp_format(tables, page_text)
-                
-                all_items.extend(page_items)
+            all_items = _extract_page_items(first_page_tables, first_page_text, result.format_detected)
+            result.pages_processed = num_pages - start_page
+            remaining = list(range(start_page + 1, num_pages))
+            
+            if EXTRACT_WORKERS > 1 and len(remaining) + 1 >= PARALLEL_MIN_PAGES:
+                # Split remaining pages into one contiguous run per worker
+                run_len = (len(remaining) + EXTRACT_WORKERS - 1) // EXTRACT_WORKERS
+                runs = [remaining[i:i + run_len] for i in range(0, len(remaining), run_len)]
+                for run_items in _get_executor().map(
+                    _extract_pages_worker,
+                    [pdf_path] * len(runs),
+                    runs,
+                    [result.format_detected] * len(runs),
+                    [table_settings] * len(runs)
+                ):
+                    for page_items in run_items:
+                        all_items.extend(page_items)
+            else:
+                for page_num in remaining:
+                    page_text, tables = _read_page(pdf, page_num, table_settings)
+                    all_items.extend(_extract_page_items(tables, page_text, result.format_detected))
             
             # Renumber items
             for i, item in enumerate(all_items):
@@ -618,8 +858,103 @@ def extract_items_from_pdf(pdf_path: str, start_page: int = 0) -> ExtractionResu
     return result
 
 
+# Fillable header fields added to the first output page: (name, rect, tooltip).
+# Rects are (x1, y1, x2, y2) based on the DD1750 layout.
+_FORM_FIELDS = (
+    ('packed_by', (92, 732, 230, 746), 'Packed By'),
+    ('no_boxes', (282, 732, 332, 746), 'Number of Boxes'),
+    ('req_no', (405, 732, 566, 746), 'Requisition Number'),
+    ('order_no', (405, 712, 566, 726), 'Order Number'),
+    ('end_item', (92, 689, 370, 703), 'End Item'),
+    ('date', (447, 689, 566, 703), 'Date'),
+    ('typed_name', (92, 46, 290, 60), 'Typed Name and Title'),
+)
+
+# Entries shared by every form field; each field copies this and adds its
+# /T, /Rect and /TU. pypdf writes these direct objects inline, so sharing the
+# instances between fields is safe.
+_NAME_T = NameObject("/T")
+_NAME_RECT = NameObject("/Rect")
+_NAME_TU = NameObject("/TU")
+_EMPTY_TS = TextStringObject("")
+_FIELD_TEMPLATE = {
+    NameObject("/Type"): NameObject("/Annot"),
+    NameObject("/Subtype"): NameObject("/Widget"),
+    NameObject("/FT"): NameObject("/Tx"),  # Text field
+    NameObject("/F"): NumberObject(4),  # Print flag
+    NameObject("/Ff"): NumberObject(0),  # Field flags (editable)
+    NameObject("/DA"): TextStringObject("/Helv 9 Tf 0 g"),  # Default appearance
+    NameObject("/V"): _EMPTY_TS,  # Initial value
+    NameObject("/DV"): _EMPTY_TS,  # Default value
+}
+
+
+def _draw_overlay_page(
+    can: canvas.Canvas,
+    items: List[BomItem],
+    start: int,
+    end: int,
+    page_num: int,
+    total_pages: int
+) -> None:
+    """
+    Draw item data for a single DD1750 page onto the current canvas page.
+    
+    Fills in:
+    - Page numbers (automatically calculated)
+    - Table items
+    
+    Does not start a new page; callers call can.showPage() between pages.
+    
+    Args:
+        can: ReportLab canvas to draw on
+        items: Full list of items
+        start: Index of the first item on this page
+        end: Index one past the last item on this page (at most 18 items)
+        page_num: Current page number (1-based)
+        total_pages: Total number of pages
+    """
+    # === HEADER FIELDS ===
+    # PAGE NUMBERS - Always fill these in as static text
+    can.setFont("Helvetica", 10)
+    can.drawCentredString(472, PAGE_H - 132, str(page_num))      # Current page
+    can.drawCentredString(520, PAGE_H - 132, str(total_pages))   # Total pages
+    
+    # === TABLE CONTENT ===
+    # Rows go top to bottom: first line holds the description and values,
+    # second line the NSN. Text is drawn one font size at a time so the font
+    # is set three times per page rather than several times per row.
+    rows = range(start, end)
+    
+    # Box number, Unit of Issue (always EA), Initial Operation, Running Spares
+    # (always 0) and Total - all centered
+    can.setFont("Helvetica", 9)
+    for i, y in zip(rows, _ROW_Y_LINE1):
+        item = items[i]
+        qty = str(item.qty)
+        can.drawCentredString(X_BOX_C, y, str(item.line_no))
+        can.drawCentredString(X_UOI_C, y, "EA")
+        can.drawCentredString(X_INIT_C, y, qty)
+        can.drawCentredString(X_SPARES_C, y, "0")
+        can.drawCentredString(X_TOTAL_C, y, qty)
+    
+    # Description (left-aligned with padding)
+    can.setFont("Helvetica", 8)
+    for i, y in zip(rows, _ROW_Y_LINE1):
+        can.drawString(X_CONTENT_TEXT, y, items[i].description[:55])
+    
+    # NSN on second line if present
+    can.setFont("Helvetica", 7)
+    for i, y in zip(rows, _ROW_Y_LINE2):
+        nsn = items[i].nsn
+        if nsn:
+            can.drawString(X_CONTENT_TEXT, y, f"NSN: {nsn}")
+
+
 def generate_dd1750_overlay(
     items: List[BomItem], 
+    start: int,
+    end: int,
     page_num: int, 
     total_pages: int,
     header: Optional[HeaderInfo] = None
@@ -627,14 +962,12 @@ def generate_dd1750_overlay(
     """
     Generate a PDF overlay with item data for a single DD1750 page.
     
-    Fills in:
-    - Page numbers (automatically calculated)
-    - Table items
-    
     Form fields are added separately after the merge in generate_dd1750_from_items.
     
     Args:
-        items: List of items for this page (max 18)
+        items: Full list of items
+        start: Index of the first item on this page
+        end: Index one past the last item on this page (at most 18 items)
         page_num: Current page number (1-based)
         total_pages: Total number of pages
         header: Optional header information (not used - kept for API compatibility)
@@ -644,60 +977,86 @@ def generate_dd1750_overlay(
     """
     packet = io.BytesIO()
     can = canvas.Canvas(packet, pagesize=(PAGE_W, PAGE_H))
-    
-    # === HEADER FIELDS ===
-    # PAGE NUMBERS - Always fill these in as static text
-    can.setFont("Helvetica", 10)
-    can.drawCentredString(472, PAGE_H - 132, str(page_num))      # Current page
-    can.drawCentredString(520, PAGE_H - 132, str(total_pages))   # Total pages
-    
-    # === TABLE CONTENT ===
-    for i, item in enumerate(items):
-        # Calculate Y position for this row (rows go top to bottom)
-        row_top = Y_TABLE_TOP - (i * ROW_H)
-        y_line1 = row_top - 10.0    # First line (description)
-        y_line2 = row_top - 20.0    # Second line (NSN)
-        
-        # Line number in Box column (centered)
-        can.setFont("Helvetica", 9)
-        box_center_x = (X_BOX_L + X_BOX_R) / 2
-        can.drawCentredString(box_center_x, y_line1, str(item.line_no))
-        
-        # Description (left-aligned with padding)
-        can.setFont("Helvetica", 8)
-        desc = item.description[:55] if len(item.description) > 55 else item.description
-        can.drawString(X_CONTENT_L + PAD_X, y_line1, desc)
-        
-        # NSN on second line if present
-        if item.nsn:
-            can.setFont("Helvetica", 7)
-            can.drawString(X_CONTENT_L + PAD_X, y_line2, f"NSN: {item.nsn}")
-        
-        # Unit of Issue (centered) - Always EA
-        can.setFont("Helvetica", 9)
-        uoi_center_x = (X_UOI_L + X_UOI_R) / 2
-        can.drawCentredString(uoi_center_x, y_line1, "EA")
-        
-        # Initial Operation quantity (centered)
-        init_center_x = (X_INIT_L + X_INIT_R) / 2
-        can.drawCentredString(init_center_x, y_line1, str(item.qty))
-        
-        # Running Spares (centered) - always 0
-        spares_center_x = (X_SPARES_L + X_SPARES_R) / 2
-        can.drawCentredString(spares_center_x, y_line1, "0")
-        
-        # Total (centered)
-        total_center_x = (X_TOTAL_L + X_TOTAL_R) / 2
-        can.drawCentredString(total_center_x, y_line1, str(item.qty))
-    
+    _draw_overlay_page(can, items, start, end, page_num, total_pages)
     can.save()
     packet.seek(0)
     return packet
 
 
+def _template_source(template: Union[str, bytes]) -> Union[str, io.BytesIO]:
+    """Return a PdfReader source for a template given as a path or raw PDF bytes."""
+    if isinstance(template, (bytes, bytearray)):
+        return io.BytesIO(template)
+    return template
+
+
+def _merge_overlay_pages(
+    writer: PdfWriter,
+    template: Union[str, bytes],
+    overlay: PdfReader,
+    reuse_template: bool
+) -> None:
+    """
+    Add one template page per overlay page to writer, with the overlay merged on.
+    
+    With reuse_template, the template is parsed once and its page is merged
+    and added repeatedly. add_page() remembers which template objects it has
+    already copied, so that record (pypdf's private PdfWriter._id_translated,
+    see the pin in requirements.txt) is dropped before each page to give every
+    output page its own content and form widgets. Otherwise the template is
+    parsed again for each page, using only public pypdf API (about 2x slower).
+    
+    Args:
+        writer: Writer to add the pages to
+        template: Path to the DD1750 template PDF, or its contents as bytes
+        overlay: Overlay PDF with one page per output page
+        reuse_template: Parse the template once instead of once per page
+    """
+    if reuse_template and not hasattr(writer, '_id_translated'):
+        reuse_template = False
+    
+    if reuse_template:
+        template_reader = PdfReader(_template_source(template))
+        template_page = template_reader.pages[0]
+        template_entries = dict(template_page)
+    
+    for overlay_page in overlay.pages:
+        if not reuse_template:
+            template_page = PdfReader(_template_source(template)).pages[0]
+        
+        # The overlay is drawn over the template within the same page box,
+        # so no expansion
+        template_page.merge_page(overlay_page, expand=False, over=True)
+        if reuse_template:
+            writer._id_translated.pop(id(template_reader), None)
+        writer.add_page(template_page)
+        
+        if reuse_template:
+            # merge_page() only replaces top-level page entries; restore them
+            template_page.clear()
+            template_page.update(template_entries)
+
+
+def _pages_share_objects(writer: PdfWriter) -> bool:
+    """Return True if any two pages share a content stream or annotation object."""
+    seen = set()
+    for page in writer.pages:
+        refs = [page.raw_get('/Contents')]
+        annots = page.get('/Annots')
+        if annots is not None:
+            refs.extend(annots.get_object())
+        for ref in refs:
+            if not isinstance(ref, IndirectObject):
+                continue
+            if ref.idnum in seen:
+                return True
+            seen.add(ref.idnum)
+    return False
+
+
 def generate_dd1750_from_items(
     items: List[BomItem],
-    template_path: str,
+    template: Union[str, bytes],
     output_path: str,
     header: Optional[HeaderInfo] = None
 ) -> Tuple[str, int]:
@@ -706,99 +1065,66 @@ def generate_dd1750_from_items(
     
     Args:
         items: List of BomItem objects
-        template_path: Path to blank DD1750 template PDF
+        template: Path to blank DD1750 template PDF, or its contents as bytes
         output_path: Path for output PDF
         header: Optional header information (packed by, date, etc.)
         
     Returns:
         Tuple of (output_path, item_count)
     """
-    from pypdf.generic import (
-        DictionaryObject, ArrayObject, NameObject, 
-        TextStringObject, NumberObject, FloatObject
-    )
-    from pypdf.annotations import FreeText
-    
     if not items:
         # Return blank template if no items
-        reader = PdfReader(template_path)
+        reader = PdfReader(_template_source(template))
         writer = PdfWriter()
         writer.add_page(reader.pages[0])
         with open(output_path, 'wb') as f:
             writer.write(f)
         return output_path, 0
     
-    total_pages = math.ceil(len(items) / ROWS_PER_PAGE)
-    writer = PdfWriter()
+    total_pages = (len(items) + ROWS_PER_PAGE - 1) // ROWS_PER_PAGE
     
+    # Draw all page overlays on one canvas so the overlay PDF is written and
+    # parsed once rather than once per page
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, pagesize=(PAGE_W, PAGE_H))
     for page_num in range(total_pages):
         start_idx = page_num * ROWS_PER_PAGE
         end_idx = min((page_num + 1) * ROWS_PER_PAGE, len(items))
-        page_items = items[start_idx:end_idx]
-        
-        # Generate overlay with header info
-        overlay_buffer = generate_dd1750_overlay(
-            page_items, 
-            page_num + 1, 
-            total_pages,
-            header
-        )
-        overlay = PdfReader(overlay_buffer)
-        
-        # Merge with template
-        template_page = PdfReader(template_path).pages[0]
-        template_page.merge_page(overlay.pages[0])
-        writer.add_page(template_page)
+        
+        _draw_overlay_page(can, items, start_idx, end_idx, page_num + 1, total_pages)
+        can.showPage()
+    can.save()
+    packet.seek(0)
+    overlay = PdfReader(packet)
     
-    # Add fillable form fields to the first page
-    # Define form field positions (x, y, width, height) based on DD1750 layout
-    form_fields = [
-        {'name': 'packed_by', 'rect': (92, 732, 230, 746), 'tooltip': 'Packed By'},
-        {'name': 'no_boxes', 'rect': (282, 732, 332, 746), 'tooltip': 'Number of Boxes'},
-        {'name': 'req_no', 'rect': (405, 732, 566, 746), 'tooltip': 'Requisition Number'},
-        {'name': 'order_no', 'rect': (405, 712, 566, 726), 'tooltip': 'Order Number'},
-        {'name': 'end_item', 'rect': (92, 689, 370, 703), 'tooltip': 'End Item'},
-        {'name': 'date', 'rect': (447, 689, 566, 703), 'tooltip': 'Date'},
-        {'name': 'typed_name', 'rect': (92, 46, 290, 60), 'tooltip': 'Typed Name and Title'},
-    ]
+    writer = PdfWriter()
+    _merge_overlay_pages(writer, template, overlay, reuse_template=True)
+    if _pages_share_objects(writer):
+        # The single-reader fast path relies on pypdf internals; if a pypdf
+        # change makes pages share content or widgets, build them the slow way
+        logger.warning("Output pages share template objects; re-parsing the template per page")
+        writer = PdfWriter()
+        _merge_overlay_pages(writer, template, overlay, reuse_template=False)
     
+    # Add fillable form fields to the first page
     # Create AcroForm for the document
+    fields = ArrayObject()
     writer._root_object[NameObject("/AcroForm")] = DictionaryObject({
-        NameObject("/Fields"): ArrayObject([]),
+        NameObject("/Fields"): fields,
         NameObject("/NeedAppearances"): NameObject("/true")
     })
     
-    # Add text fields to first page
-    page = writer.pages[0]
-    
-    for field_def in form_fields:
-        # Create text field annotation
-        field = DictionaryObject({
-            NameObject("/Type"): NameObject("/Annot"),
-            NameObject("/Subtype"): NameObject("/Widget"),
-            NameObject("/FT"): NameObject("/Tx"),  # Text field
-            NameObject("/T"): TextStringObject(field_def['name']),
-            NameObject("/Rect"): ArrayObject([
-                FloatObject(field_def['rect'][0]),
-                FloatObject(field_def['rect'][1]),
-                FloatObject(field_def['rect'][2]),
-                FloatObject(field_def['rect'][3])
-            ]),
-            NameObject("/F"): NumberObject(4),  # Print flag
-            NameObject("/Ff"): NumberObject(0),  # Field flags (editable)
-            NameObject("/DA"): TextStringObject("/Helv 9 Tf 0 g"),  # Default appearance
-            NameObject("/TU"): TextStringObject(field_def['tooltip']),  # Tooltip
-            NameObject("/V"): TextStringObject(""),  # Initial value
-            NameObject("/DV"): TextStringObject(""),  # Default value
-        })
-        
-        # Add to page annotations
-        if "/Annots" not in page:
-            page[NameObject("/Annots")] = ArrayObject([])
-        page[NameObject("/Annots")].append(field)
-        
-        # Add to AcroForm fields
-        writer._root_object["/AcroForm"]["/Fields"].append(field)
+    for name, rect, tooltip in _FORM_FIELDS:
+        # Create text field annotation from the shared entries
+        field = DictionaryObject(_FIELD_TEMPLATE)
+        field[_NAME_T] = TextStringObject(name)
+        field[_NAME_RECT] = ArrayObject([FloatObject(v) for v in rect])
+        field[_NAME_TU] = TextStringObject(tooltip)  # Tooltip
+        
+        # Add to the first page's annotations as an indirect object and
+        # register it with the AcroForm
+        annotation = writer.add_annotation(page_number=0, annotation=field)
+        fields.append(annotation.indirect_reference)
     
     with open(output_path, 'wb') as f:
         writer.write(f)
@@ -830,21 +1156,19 @@ def generate_dd1750_from_pdf(
         result = extract_items_from_pdf(bom_path, start_page)
         
         if result.errors:
-            print(f"Errors during extraction: {result.errors}")
+            logger.warning("Errors during extraction: %s", result.errors)
         
         if result.warnings:
-            print(f"Warnings: {result.warnings}")
+            logger.warning("Warnings: %s", result.warnings)
         
-        print(f"Format detected: {result.format_detected.value}")
-        print(f"Items found: {len(result.items)}")
-        print(f"Pages processed: {result.pages_processed}")
+        logger.debug("Format detected: %s", result.format_detected.value)
+        logger.debug("Items found: %d", len(result.items))
+        logger.debug("Pages processed: %d", result.pages_processed)
         
         return generate_dd1750_from_items(result.items, template_path, output_path)
         
     except Exception as e:
-        print(f"Critical error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Critical error: %s", e)
         
         # Return blank template on error
         try:
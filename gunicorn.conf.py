@@ -0,0 +1,28 @@
+"""
+Gunicorn configuration for the DD1750 Converter.
+
+Usage:
+    gunicorn app:app -c gunicorn.conf.py
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Threaded workers so concurrent uploads overlap I/O while PDFs are parsed.
+# Each worker also starts its own EXTRACT_WORKERS process pool when that is
+# above 1, so lower WEB_CONCURRENCY when enabling parallel extraction.
+# Sessions are only shared between workers through Redis, so default to two
+# workers with REDIS_URL and one without. Not derived from cpu_count(), which
+# reports host CPUs inside containers.
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 if os.environ.get('REDIS_URL') else 1))
+worker_class = 'gthread'
+threads = 4
+timeout = 300
+
+# Recycle workers periodically to bound memory growth from PDF parsing
+max_requests = 500
+max_requests_jitter = 50
+
+# Import the app once in the master so workers share it copy-on-write
+preload_app = True